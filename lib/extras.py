@@ -44,15 +44,15 @@ from psycopg2.extensions import adapt as _A
 
 
 class DictCursorBase(_cursor):
-    """Base class for all dict-like cursors."""
+    """Base class for all dict-like cursors.
+
+    Subclasses can pass a *row_factory* to fill the rows while they are
+    fetched, or omit it to receive plain tuples to convert in their own
+    `!fetch*()` methods.
+    """
 
     def __init__(self, *args, **kwargs):
-        if kwargs.has_key('row_factory'):
-            row_factory = kwargs['row_factory']
-            del kwargs['row_factory']
-        else:
-            raise NotImplementedError(
-                "DictCursorBase can't be instantiated without a row factory.")
+        row_factory = kwargs.pop('row_factory', None)
         _cursor.__init__(self, *args, **kwargs)
         self._query_executed = 0
         self._prefetch = 0
@@ -68,6 +68,8 @@ class DictCursorBase(_cursor):
         return res
 
     def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
         if self._prefetch:
             res = _cursor.fetchmany(self, size)
         if self._query_executed:
@@ -86,16 +88,14 @@ class DictCursorBase(_cursor):
         return res
 
     def next(self):
+        # use the base class iterator: on named cursors it fetches
+        # itersize records per roundtrip instead of one at time.
         if self._prefetch:
-            res = _cursor.fetchone(self)
-            if res is None:
-                raise StopIteration()
+            res = _cursor.next(self)
         if self._query_executed:
             self._build_index()
         if not self._prefetch:
-            res = _cursor.fetchone(self)
-            if res is None:
-                raise StopIteration()
+            res = _cursor.next(self)
         return res
 
 class DictConnection(_connection):
@@ -126,8 +126,11 @@ class DictCursor(DictCursorBase):
 
     def _build_index(self):
         if self._query_executed == 1 and self.description:
-            for i in range(len(self.description)):
-                self.index[self.description[i][0]] = i
+            # the index must be filled in place: rows fetched before the
+            # description was available already hold a reference to it.
+            index = self.index
+            for i, d in enumerate(self.description):
+                index[d[0]] = i
             self._query_executed = 0
 
 class DictRow(list):
@@ -139,22 +142,20 @@ class DictRow(list):
         self._index = cursor.index
         self[:] = [None] * len(cursor.description)
 
-    def __getitem__(self, x):
-        if type(x) != int:
+    def __getitem__(self, x, _getitem=list.__getitem__):
+        if type(x) is not int:
             x = self._index[x]
-        return list.__getitem__(self, x)
+        return _getitem(self, x)
 
     def items(self):
-        res = []
-        for n, v in self._index.items():
-            res.append((n, list.__getitem__(self, v)))
-        return res
+        return [(n, list.__getitem__(self, v))
+            for n, v in self._index.iteritems()]
 
     def keys(self):
         return self._index.keys()
 
     def values(self):
-        return tuple(self[:])
+        return tuple(self)
 
     def has_key(self, x):
         return self._index.has_key(x)
@@ -166,7 +167,7 @@ class DictRow(list):
             return default
 
     def iteritems(self):
-        for n, v in self._index.items():
+        for n, v in self._index.iteritems():
             yield n, list.__getitem__(self, v)
 
     def iterkeys(self):
@@ -181,6 +182,14 @@ class DictRow(list):
     def __contains__(self, x):
         return self._index.__contains__(x)
 
+    # a class defining __slots__ must define these methods to be pickled
+    def __getstate__(self):
+        return self[:], self._index.copy()
+
+    def __setstate__(self, data):
+        self[:] = data[0]
+        self._index = data[1]
+
 class RealDictConnection(_connection):
     """A connection that uses `RealDictCursor` automatically."""
     def cursor(self, name=None):
@@ -198,10 +207,9 @@ class RealDictCursor(DictCursorBase):
     the generic `DictCursor` instead of `!RealDictCursor`.
     """
 
-    def __init__(self, *args, **kwargs):
-        kwargs['row_factory'] = RealDictRow
-        DictCursorBase.__init__(self, *args, **kwargs)
-        self._prefetch = 0
+    # No row_factory is passed to the base class: rows are fetched as plain
+    # tuples and converted to dicts in a single call, instead of being
+    # filled one column at time.
 
     def execute(self, query, vars=None):
         self.column_mapping = []
@@ -213,19 +221,50 @@ class RealDictCursor(DictCursorBase):
         self._query_executed = 1
         return _cursor.callproc(self, procname, vars)
 
+    def fetchone(self):
+        t = _cursor.fetchone(self)
+        if t is not None:
+            if self._query_executed:
+                self._build_index()
+            return RealDictRow(self, t)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        ts = _cursor.fetchmany(self, size)
+        if self._query_executed:
+            self._build_index()
+        return [RealDictRow(self, t) for t in ts]
+
+    def fetchall(self):
+        ts = _cursor.fetchall(self)
+        if self._query_executed:
+            self._build_index()
+        return [RealDictRow(self, t) for t in ts]
+
+    def next(self):
+        t = _cursor.next(self)
+        if self._query_executed:
+            self._build_index()
+        return RealDictRow(self, t)
+
     def _build_index(self):
         if self._query_executed == 1 and self.description:
-            for i in range(len(self.description)):
-                self.column_mapping.append(self.description[i][0])
+            self.column_mapping = [d[0] for d in self.description]
             self._query_executed = 0
 
 class RealDictRow(dict):
     """A ``dict`` subclass representing a data record."""
 
-    __slots__ = ('_column_mapping')
+    __slots__ = ('_column_mapping',)
 
-    def __init__(self, cursor):
-        dict.__init__(self)
+    def __init__(self, cursor, values=None):
+        # values is None when the class is used as a cursor row_factory:
+        # in this case the row is filled by the cursor using __setitem__.
+        if values is None:
+            dict.__init__(self)
+        else:
+            dict.__init__(self, zip(cursor.column_mapping, values))
         self._column_mapping = cursor.column_mapping
 
     def __setitem__(self, name, value):
@@ -233,6 +272,13 @@ class RealDictRow(dict):
             name = self._column_mapping[name]
         return dict.__setitem__(self, name, value)
 
+    def __getstate__(self):
+        return (self.copy(), self._column_mapping[:])
+
+    def __setstate__(self, data):
+        self.update(data[0])
+        self._column_mapping = data[1]
+
 
 class NamedTupleConnection(_connection):
     """A connection that uses `NamedTupleCursor` automatically."""
@@ -259,24 +305,69 @@ class NamedTupleCursor(_cursor):
     .. |namedtuple| replace:: `!namedtuple`
     .. __: http://docs.python.org/release/2.6/library/collections.html#collections.namedtuple
     """
-    def fetchone(self):
+    Record = None
+
+    # Record classes already generated, by column names. Creating a
+    # namedtuple class is expensive, so classes are shared between cursors
+    # returning the same columns.
+    _nt_cache = {}
+    _nt_cache_size = 512
+
+    def execute(self, query, vars=None):
+        self.Record = None
+        return _cursor.execute(self, query, vars)
+
+    def executemany(self, query, vars):
+        self.Record = None
+        return _cursor.executemany(self, query, vars)
+
+    def callproc(self, procname, vars=None):
+        self.Record = None
+        return _cursor.callproc(self, procname, vars)
+
+    # Records are created calling tuple.__new__ directly: the namedtuple
+    # constructor would just unpack the arguments to do the same.
+    def fetchone(self, _new=tuple.__new__):
         t = _cursor.fetchone(self)
         if t is not None:
-            nt = self._make_nt()
-            return nt(*t)
-
-    def fetchmany(self, size=None):
-        nt = self._make_nt()
+            nt = self.Record
+            if nt is None:
+                nt = self.Record = self._make_nt()
+            return _new(nt, t)
+
+    def fetchmany(self, size=None, _new=tuple.__new__):
+        if size is None:
+            size = self.arraysize
         ts = _cursor.fetchmany(self, size)
-        return [nt(*t) for t in ts]
+        nt = self.Record
+        if nt is None:
+            nt = self.Record = self._make_nt()
+        return [_new(nt, t) for t in ts]
 
-    def fetchall(self):
-        nt = self._make_nt()
+    def fetchall(self, _new=tuple.__new__):
         ts = _cursor.fetchall(self)
-        return [nt(*t) for t in ts]
+        nt = self.Record
+        if nt is None:
+            nt = self.Record = self._make_nt()
+        return [_new(nt, t) for t in ts]
 
     def __iter__(self):
-        return iter(self.fetchall())
+        if self.name is None:
+            # the records of a client-side cursor are all in memory already:
+            # iterate on a copy so the cursor can execute other queries in
+            # the loop.
+            return iter(self.fetchall())
+        return self._iter_named()
+
+    def _iter_named(self, _new=tuple.__new__):
+        # a named cursor fetches itersize records per roundtrip from the
+        # base class iterator instead of the whole result set.
+        while 1:
+            t = _cursor.next(self)
+            nt = self.Record
+            if nt is None:
+                nt = self.Record = self._make_nt()
+            yield _new(nt, t)
 
     try:
         from collections import namedtuple
@@ -285,7 +376,15 @@ class NamedTupleCursor(_cursor):
             raise self._exc
     else:
         def _make_nt(self, namedtuple=namedtuple):
-            return namedtuple("Record", [d[0] for d in self.description])
+            key = tuple([d[0] for d in self.description])
+            cache = self._nt_cache
+            try:
+                return cache[key]
+            except KeyError:
+                if len(cache) >= self._nt_cache_size:
+                    cache.clear()
+                nt = cache[key] = namedtuple("Record", key)
+                return nt
 
 
 class LoggingConnection(_connection):
@@ -25,6 +25,7 @@ This module implements thread-safe (and not) connection pools.
 # License for more details.
 
 import psycopg2
+import psycopg2.extensions as _ext
 
 try:
     import logging
@@ -112,18 +113,48 @@ class AbstractConnectionPool(object):
                 raise PoolError("connection pool exausted")
             return self._connect(key)
 		 
-    def _putconn(self, conn, key=None, close=False):
-        """Put away a connection."""
+    def _prepconn(self, conn):
+        """Return a connection into a consistent state before pooling it.
+
+        Connections in a transaction or in error state are rolled back,
+        connections that can't be recovered are closed. This method talks
+        to the backend, so it must not be called holding the pool lock.
+        """
+        if conn.closed:
+            return
+
+        status = conn.get_transaction_status()
+        if status == _ext.TRANSACTION_STATUS_UNKNOWN:
+            # server connection lost
+            conn.close()
+        elif status != _ext.TRANSACTION_STATUS_IDLE:
+            # connection in error or in transaction
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                # the connection can't be recovered: discard it. If the
+                # server went away the connection is already marked closed
+                # and close() would raise.
+                if not conn.closed:
+                    conn.close()
+
+    def _release(self, conn, key=None, close=False):
+        """Remove a connection from the used ones.
+
+        The connection is put back into the pool if there is room for it.
+        Return True if the connection must be closed by the caller instead.
+        """
         if self.closed: raise PoolError("connection pool is closed")
         if key is None: key = self._rused[id(conn)]
 
         if not key:
             raise PoolError("trying to put unkeyed connection")
 
-        if len(self._pool) < self.minconn and not close:
+        discard = False
+        if len(self._pool) < self.minconn and not close and not conn.closed:
             self._pool.append(conn)
-        else:
-            conn.close()
+        elif not conn.closed:
+            discard = True
 
         # here we check for the presence of key because it can happen that a
         # thread tries to put back a connection after a call to close
@@ -131,6 +162,15 @@ class AbstractConnectionPool(object):
             del self._used[key]
             del self._rused[id(conn)]
 
+        return discard
+
+    def _putconn(self, conn, key=None, close=False):
+        """Put away a connection."""
+        if not close:
+            self._prepconn(conn)
+        if self._release(conn, key, close):
+            conn.close()
+
     def _closeall(self):
         """Close all connections.
 
@@ -175,11 +215,17 @@ class ThreadedConnectionPool(AbstractConnectionPool):
 
     def putconn(self, conn=None, key=None, close=False):
         """Put away an unused connection."""
+        # talk to the backend before taking the lock: a slow server must
+        # not block the other threads using the pool.
+        if not close:
+            self._prepconn(conn)
         self._lock.acquire()
         try:
-            self._putconn(conn, key, close)
+            discard = self._release(conn, key, close)
         finally:
             self._lock.release()
+        if discard:
+            conn.close()
 
     def closeall(self):
         """Close all connections (even the one currently in use.)"""
@@ -224,12 +270,21 @@ class PersistentConnectionPool(AbstractConnectionPool):
     def putconn(self, conn=None, close=False):
         """Put away an unused connection."""
         key = self.__thread.get_ident()
+        if not conn:
+            self._lock.acquire()
+            try:
+                conn = self._used[key]
+            finally:
+                self._lock.release()
+        if not close:
+            self._prepconn(conn)
         self._lock.acquire()
         try:
-            if not conn: conn = self._used[key]
-            self._putconn(conn, key, close)
+            discard = self._release(conn, key, close)
         finally:
             self._lock.release()
+        if discard:
+            conn.close()
 
     def closeall(self):
         """Close all connections (even the one currently in use.)"""
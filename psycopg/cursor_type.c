@@ -730,6 +730,47 @@ _psyco_curs_buildrow_with_factory(cursorObject *self, int row)
     return _psyco_curs_buildrow_fill(self, res, row, n, 0);
 }
 
+/* _psyco_curs_named_buffered - number of records not returned yet
+ *
+ * while iterating, a named cursor fetches itersize records in a single
+ * FETCH: the fetch*() methods must return these records before asking the
+ * backend for more. */
+
+static long int
+_psyco_curs_named_buffered(cursorObject *self)
+{
+    if (self->pgres == NULL || self->notuples)
+        return 0;
+    return self->rowcount - self->row;
+}
+
+/* _psyco_curs_buildrows - append size records from the result to a list */
+
+static int
+_psyco_curs_buildrows(cursorObject *self, PyObject *list, long int size)
+{
+    PyObject *res;
+    int err;
+
+    for (; size > 0; size--) {
+        if (self->tuple_factory == Py_None)
+            res = _psyco_curs_buildrow(self, self->row);
+        else
+            res = _psyco_curs_buildrow_with_factory(self, self->row);
+
+        self->row++;
+
+        if (res == NULL)
+            return -1;
+
+        err = PyList_Append(list, res);
+        Py_DECREF(res);
+        if (err == -1)
+            return -1;
+    }
+    return 0;
+}
+
 static PyObject *
 psyco_curs_fetchone(cursorObject *self, PyObject *args)
 {
@@ -745,9 +786,14 @@ psyco_curs_fetchone(cursorObject *self, PyObject *args)
 
         EXC_IF_NO_MARK(self);
         EXC_IF_TPC_PREPARED(self->conn, fetchone);
-        PyOS_snprintf(buffer, 127, "FETCH FORWARD 1 FROM %s", self->name);
-        if (pq_execute(self, buffer, 0) == -1) return NULL;
-        if (_psyco_curs_prefetch(self) < 0) return NULL;
+
+        /* records left by next() are returned before fetching again */
+        if (_psyco_curs_named_buffered(self) <= 0) {
+            PyOS_snprintf(buffer, 127, "FETCH FORWARD 1 FROM %s",
+                self->name);
+            if (pq_execute(self, buffer, 0) == -1) return NULL;
+            if (_psyco_curs_prefetch(self) < 0) return NULL;
+        }
     }
 
     Dprintf("psyco_curs_fetchone: fetching row %ld", self->row);
@@ -804,13 +850,33 @@ psyco_curs_fetchmany(cursorObject *self, PyObject *args, PyObject *kwords)
 
     if (self->name != NULL) {
         char buffer[128];
+        long int buffered;
 
         EXC_IF_NO_MARK(self);
         EXC_IF_TPC_PREPARED(self->conn, fetchone);
-        PyOS_snprintf(buffer, 127, "FETCH FORWARD %d FROM %s",
-            (int)size, self->name);
-        if (pq_execute(self, buffer, 0) == -1) return NULL;
-        if (_psyco_curs_prefetch(self) < 0) return NULL;
+
+        buffered = _psyco_curs_named_buffered(self);
+        if (buffered > 0 && size > buffered) {
+            /* return the buffered records and fetch only the missing ones */
+            list = PyList_New(0);
+            if (list == NULL) return NULL;
+            if (_psyco_curs_buildrows(self, list, buffered) == -1)
+                goto fail;
+            PyOS_snprintf(buffer, 127, "FETCH FORWARD %d FROM %s",
+                (int)(size - buffered), self->name);
+            if (pq_execute(self, buffer, 0) == -1) goto fail;
+            if (_psyco_curs_prefetch(self) < 0) goto fail;
+            if (_psyco_curs_buildrows(self, list,
+                    self->rowcount - self->row) == -1)
+                goto fail;
+            return list;
+        }
+        else if (buffered <= 0) {
+            PyOS_snprintf(buffer, 127, "FETCH FORWARD %d FROM %s",
+                (int)size, self->name);
+            if (pq_execute(self, buffer, 0) == -1) return NULL;
+            if (_psyco_curs_prefetch(self) < 0) return NULL;
+        }
     }
 
     /* make sure size is not > than the available number of rows */
@@ -849,6 +915,10 @@ psyco_curs_fetchmany(cursorObject *self, PyObject *args, PyObject *kwords)
         IFCLEARPGRES(self->pgres);
 
     return list;
+
+fail:
+    Py_DECREF(list);
+    return NULL;
 }
 
 
@@ -874,12 +944,24 @@ psyco_curs_fetchall(cursorObject *self, PyObject *args)
 
     if (self->name != NULL) {
         char buffer[128];
+        long int buffered;
 
         EXC_IF_NO_MARK(self);
         EXC_IF_TPC_PREPARED(self->conn, fetchall);
+
+        /* return the records buffered while iterating before the others */
+        buffered = _psyco_curs_named_buffered(self);
+        list = PyList_New(0);
+        if (list == NULL) return NULL;
+        if (_psyco_curs_buildrows(self, list, buffered) == -1)
+            goto fail;
         PyOS_snprintf(buffer, 127, "FETCH FORWARD ALL FROM %s", self->name);
-        if (pq_execute(self, buffer, 0) == -1) return NULL;
-        if (_psyco_curs_prefetch(self) < 0) return NULL;
+        if (pq_execute(self, buffer, 0) == -1) goto fail;
+        if (_psyco_curs_prefetch(self) < 0) goto fail;
+        if (_psyco_curs_buildrows(self, list,
+                self->rowcount - self->row) == -1)
+            goto fail;
+        return list;
     }
 
     size = self->rowcount - self->row;
@@ -913,6 +995,10 @@ psyco_curs_fetchall(cursorObject *self, PyObject *args)
         IFCLEARPGRES(self->pgres);
 
     return list;
+
+fail:
+    Py_DECREF(list);
+    return NULL;
 }
 
 
@@ -1089,7 +1175,10 @@ psyco_curs_scroll(cursorObject *self, PyObject *args, PyObject *kwargs)
                 value, self->name);
         }
         else {
-            PyOS_snprintf(buffer, 127, "MOVE %d FROM %s", value, self->name);
+            /* the backend is positioned after the records buffered while
+               iterating: move relatively to the last record returned */
+            PyOS_snprintf(buffer, 127, "MOVE %d FROM %s",
+                value - (int)_psyco_curs_named_buffered(self), self->name);
         }
         if (pq_execute(self, buffer, 0) == -1) return NULL;
         if (_psyco_curs_prefetch(self) < 0) return NULL;
@@ -1479,11 +1568,67 @@ cursor_iter(PyObject *self)
     return self;
 }
 
+/* next_named - fetch the next record from a named cursor
+ *
+ * records are fetched from the backend in blocks of itersize rows and
+ * returned one at time, to save a network roundtrip per record */
+
+static PyObject *
+psyco_curs_next_named(cursorObject *self)
+{
+    PyObject *res;
+
+    EXC_IF_CURS_CLOSED(self);
+    EXC_IF_ASYNC_IN_PROGRESS(self, next);
+    if (_psyco_curs_prefetch(self) < 0) return NULL;
+    EXC_IF_NO_TUPLES(self);
+
+    EXC_IF_NO_MARK(self);
+    EXC_IF_TPC_PREPARED(self->conn, next);
+
+    Dprintf("psyco_curs_next_named: row %ld", self->row);
+    Dprintf("psyco_curs_next_named: rowcount = %ld", self->rowcount);
+
+    if (_psyco_curs_named_buffered(self) <= 0) {
+        char buffer[128];
+
+        /* FETCH FORWARD 0 would return the current row again */
+        PyOS_snprintf(buffer, 127, "FETCH FORWARD %ld FROM %s",
+            self->itersize > 0 ? self->itersize : 1, self->name);
+        if (pq_execute(self, buffer, 0) == -1) return NULL;
+        if (_psyco_curs_prefetch(self) < 0) return NULL;
+    }
+
+    /* we exausted available data: return NULL to stop iteration */
+    if (_psyco_curs_named_buffered(self) <= 0) {
+        return NULL;
+    }
+
+    if (self->tuple_factory == Py_None)
+        res = _psyco_curs_buildrow(self, self->row);
+    else
+        res = _psyco_curs_buildrow_with_factory(self, self->row);
+
+    self->row++; /* move the counter to next line */
+
+    /* if the query was async aggresively free pgres, to allow
+       successive requests to reallocate it */
+    if (self->row >= self->rowcount
+        && self->conn->async_cursor == (PyObject*)self)
+        IFCLEARPGRES(self->pgres);
+
+    return res;
+}
+
 static PyObject *
 cursor_next(PyObject *self)
 {
     PyObject *res;
 
+    if (((cursorObject*)self)->name != NULL) {
+        return psyco_curs_next_named((cursorObject*)self);
+    }
+
     /* we don't parse arguments: psyco_curs_fetchone will do that for us */
     res = psyco_curs_fetchone((cursorObject*)self, NULL);
 
@@ -1547,6 +1692,8 @@ static struct PyMemberDef cursorObject_members[] = {
     {"arraysize", T_LONG, OFFSETOF(arraysize), 0,
         "Number of records `fetchmany()` must fetch if not explicitly " \
         "specified."},
+    {"itersize", T_LONG, OFFSETOF(itersize), 0,
+        "Number of records ``iter(cur)`` must fetch per network roundtrip."},
     {"description", T_OBJECT, OFFSETOF(description), RO,
         "Cursor description as defined in DBAPI-2.0."},
     {"lastrowid", T_LONG, OFFSETOF(lastoid), RO,
@@ -1609,6 +1756,7 @@ cursor_setup(cursorObject *self, connectionObject *conn, const char *name)
     self->pgres = NULL;
     self->notuples = 1;
     self->arraysize = 1;
+    self->itersize = DEFAULT_ITERSIZE;
     self->rowcount = -1;
     self->lastoid = InvalidOid;
 
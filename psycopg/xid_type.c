@@ -393,22 +393,25 @@ XidObject *xid_ensure(PyObject *oxid)
 }
 
 
-/* Encode or decode a string in base64. */
+/* Encode or decode a string in base64.
+ *
+ * Call the binascii functions directly: the base64 module functions are
+ * just Python wrappers around them. */
 
 static PyObject *
 _xid_base64_enc_dec(const char *funcname, PyObject *s)
 {
-    PyObject *base64 = NULL;
+    PyObject *binascii = NULL;
     PyObject *func = NULL;
     PyObject *rv = NULL;
 
-    if (!(base64 = PyImport_ImportModule("base64"))) { goto exit; }
-    if (!(func = PyObject_GetAttrString(base64, funcname))) { goto exit; }
+    if (!(binascii = PyImport_ImportModule("binascii"))) { goto exit; }
+    if (!(func = PyObject_GetAttrString(binascii, funcname))) { goto exit; }
     rv = PyObject_CallFunctionObjArgs(func, s, NULL);
 
 exit:
     Py_XDECREF(func);
-    Py_XDECREF(base64);
+    Py_XDECREF(binascii);
 
     return rv;
 }
@@ -418,7 +421,17 @@ exit:
 static PyObject *
 _xid_encode64(PyObject *s)
 {
-    return _xid_base64_enc_dec("b64encode", s);
+    PyObject *enc;
+    PyObject *rv;
+
+    if (!(enc = _xid_base64_enc_dec("b2a_base64", s))) { return NULL; }
+
+    /* drop the newline added by b2a_base64 */
+    rv = PyString_FromStringAndSize(
+        PyString_AS_STRING(enc), PyString_GET_SIZE(enc) - 1);
+    Py_DECREF(enc);
+
+    return rv;
 }
 
 /* Decode a base64-encoded string */
@@ -426,7 +439,7 @@ _xid_encode64(PyObject *s)
 static PyObject *
 _xid_decode64(PyObject *s)
 {
-    return _xid_base64_enc_dec("b64decode", s);
+    return _xid_base64_enc_dec("a2b_base64", s);
 }
 
 
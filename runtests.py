@@ -15,8 +15,8 @@ platlib = os.path.join(os.path.dirname(__file__), 'build',
 if os.path.exists(platlib):
     sys.path.insert(0, platlib)
 
-import psycopg2
 import tests
+import psycopg2
 
 def test_suite():
     return tests.test_suite()
@@ -1,8 +1,19 @@
 #!/usr/bin/env python
 
 import os
+import sys
 import unittest
 
+# The C extension can't be used on PyPy: run the tests against psycopg2cffi
+# if it is available. This must happen before psycopg2 is imported.
+if '__pypy__' in sys.builtin_module_names:
+    try:
+        from psycopg2cffi import compat
+    except ImportError:
+        pass
+    else:
+        compat.register()
+
 dbname = os.environ.get('PSYCOPG2_TESTDB', 'psycopg2_test')
 dbhost = os.environ.get('PSYCOPG2_TESTDB_HOST', None)
 dbport = os.environ.get('PSYCOPG2_TESTDB_PORT', None)
@@ -31,6 +42,38 @@ if dbport is not None:
 if dbuser is not None:
     dsn += ' user=%s' % dbuser
 
+# A pool of connections to the test database, created on first use and
+# shared by the tests that don't need a private connection.
+_pool = None
+
+def get_conn():
+    """Return a connection to the test database from the tests pool."""
+    global _pool
+    if _pool is None:
+        import psycopg2.pool
+        _pool = psycopg2.pool.ThreadedConnectionPool(2, 16, dsn)
+    return _pool.getconn()
+
+def put_conn(conn):
+    """Give back to the pool a connection obtained with `get_conn()`.
+
+    Connections still open are reset: the next test will receive them
+    outside a transaction, with the parameters set by the previous test
+    reverted and with an empty `notices` list. Temporary tables and prepared
+    statements are not dropped instead, so tests needing a pristine session
+    should use a new connection.
+    """
+    if not conn.closed:
+        import psycopg2
+        try:
+            conn.reset()
+        except psycopg2.Error:
+            if not conn.closed:
+                conn.close()
+        else:
+            del conn.notices[:]
+    _pool.putconn(conn)
+
 import bugX000
 import extras_dictcursor
 import test_dates
@@ -38,6 +81,7 @@ import test_psycopg2_dbapi20
 import test_quote
 import test_connection
 import test_cursor
+import test_pool
 import test_transaction
 import types_basic
 import types_extras
@@ -56,6 +100,7 @@ def test_suite():
     suite.addTest(test_quote.test_suite())
     suite.addTest(test_connection.test_suite())
     suite.addTest(test_cursor.test_suite())
+    suite.addTest(test_pool.test_suite())
     suite.addTest(test_transaction.test_suite())
     suite.addTest(types_basic.test_suite())
     suite.addTest(types_extras.test_suite())
@@ -25,20 +25,34 @@ class ExtrasDictCursorTests(unittest.TestCase):
     """Test if DictCursor extension class works."""
 
     def setUp(self):
-        self.conn = psycopg2.connect(tests.dsn)
+        self.conn = tests.get_conn()
         curs = self.conn.cursor()
-        curs.execute("CREATE TEMPORARY TABLE ExtrasDictCursorTests (foo text)")
-        curs.execute("INSERT INTO ExtrasDictCursorTests VALUES ('bar')")
+        try:
+            curs.execute("TRUNCATE ExtrasDictCursorTests; "
+                "INSERT INTO ExtrasDictCursorTests VALUES ('bar')")
+        except psycopg2.ProgrammingError:
+            # The table is temporary, so the server drops it together with
+            # the connection. Pooled connections keep it between the tests:
+            # it is only created the first time a connection is used here.
+            self.conn.rollback()
+            curs.execute(
+                "CREATE TEMPORARY TABLE ExtrasDictCursorTests (foo text); "
+                "INSERT INTO ExtrasDictCursorTests VALUES ('bar')")
         self.conn.commit()
 
     def tearDown(self):
-        self.conn.close()
+        tests.put_conn(self.conn)
 
     def testDictCursorWithPlainCursorFetchOne(self):
         self._testWithPlainCursor(lambda curs: curs.fetchone())
 
+    # The fetchmany() tests only read the first record, so they only ask for
+    # one: a bigger size would make a named cursor fetch records to discard.
     def testDictCursorWithPlainCursorFetchMany(self):
-        self._testWithPlainCursor(lambda curs: curs.fetchmany(100)[0])
+        self._testWithPlainCursor(lambda curs: curs.fetchmany(1)[0])
+
+    def testDictCursorWithPlainCursorFetchManyNoarg(self):
+        self._testWithPlainCursor(lambda curs: curs.fetchmany()[0])
 
     def testDictCursorWithPlainCursorFetchAll(self):
         self._testWithPlainCursor(lambda curs: curs.fetchall()[0])
@@ -53,7 +67,10 @@ class ExtrasDictCursorTests(unittest.TestCase):
         self._testWithPlainCursorReal(lambda curs: curs.fetchone())
 
     def testDictCursorWithPlainCursorRealFetchMany(self):
-        self._testWithPlainCursorReal(lambda curs: curs.fetchmany(100)[0])
+        self._testWithPlainCursorReal(lambda curs: curs.fetchmany(1)[0])
+
+    def testDictCursorWithPlainCursorRealFetchManyNoarg(self):
+        self._testWithPlainCursorReal(lambda curs: curs.fetchmany()[0])
 
     def testDictCursorWithPlainCursorRealFetchAll(self):
         self._testWithPlainCursorReal(lambda curs: curs.fetchall()[0])
@@ -64,11 +81,67 @@ class ExtrasDictCursorTests(unittest.TestCase):
                 return row
         self._testWithPlainCursorReal(getter)
 
+    def testDictCursorIterReexecute(self):
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        curs.execute("SELECT * FROM ExtrasDictCursorTests")
+        i = iter(curs)
+        self.assertEqual(i.next()['foo'], 'bar')
+        # the iterator must see the state of the new query
+        curs.execute("SELECT 10 AS x, 20 AS y")
+        row = i.next()
+        self.assertEqual(row['x'], 10)
+        self.assertEqual(row['y'], 20)
+        self.assertRaises(StopIteration, i.next)
+
+    def testRealDictCursorIterReexecute(self):
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        curs.execute("SELECT * FROM ExtrasDictCursorTests")
+        i = iter(curs)
+        self.assertEqual(i.next(), {'foo': 'bar'})
+        curs.execute("SELECT 10 AS x, 20 AS y")
+        self.assertEqual(i.next(), {'x': 10, 'y': 20})
+        self.assertRaises(StopIteration, i.next)
+
+    def testDictRowMappingMethods(self):
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        curs.execute("SELECT foo, 42 AS bar FROM ExtrasDictCursorTests")
+        row = curs.fetchone()
+        self.assertEqual(sorted(row.keys()), ['bar', 'foo'])
+        self.assertEqual(sorted(row.iterkeys()), ['bar', 'foo'])
+        self.assertEqual(sorted(row.items()), [('bar', 42), ('foo', 'bar')])
+        self.assertEqual(sorted(row.iteritems()), sorted(row.items()))
+        self.assertEqual(row.values(), ('bar', 42))
+        self.assertEqual(list(row.itervalues()), ['bar', 42])
+        self.assertEqual(row.get('baz', 'default'), 'default')
+        self.assert_('foo' in row)
+
+    def testDictRowPickle(self):
+        import pickle
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        curs.execute("SELECT foo, 42 AS bar FROM ExtrasDictCursorTests")
+        row = curs.fetchone()
+        # rows use __slots__ to save memory: they must have no __dict__
+        self.assert_(not hasattr(row, '__dict__'))
+        for proto in (0, 1, 2):
+            row1 = pickle.loads(pickle.dumps(row, proto))
+            self.assertEqual(row1['foo'], 'bar')
+            self.assertEqual(row1[1], 42)
+
+    def testRealDictRowPickle(self):
+        import pickle
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        curs.execute("SELECT foo, 42 AS bar FROM ExtrasDictCursorTests")
+        row = curs.fetchone()
+        self.assert_(not hasattr(row, '__dict__'))
+        for proto in (0, 1, 2):
+            row1 = pickle.loads(pickle.dumps(row, proto))
+            self.assertEqual(dict(row1), {'foo': 'bar', 'bar': 42})
+
     def testDictCursorWithNamedCursorFetchOne(self):
         self._testWithNamedCursor(lambda curs: curs.fetchone())
 
     def testDictCursorWithNamedCursorFetchMany(self):
-        self._testWithNamedCursor(lambda curs: curs.fetchmany(100)[0])
+        self._testWithNamedCursor(lambda curs: curs.fetchmany(1)[0])
 
     def testDictCursorWithNamedCursorFetchAll(self):
         self._testWithNamedCursor(lambda curs: curs.fetchall()[0])
@@ -79,64 +152,127 @@ class ExtrasDictCursorTests(unittest.TestCase):
                 return row
         self._testWithNamedCursor(getter)
 
+    def testDictCursorWithNamedCursorIterItersize(self):
+        # a result smaller, equal and bigger than the fetched blocks
+        for itersize in (1, 100, 2000):
+            curs = self.conn.cursor('aname',
+                cursor_factory=psycopg2.extras.DictCursor)
+            curs.itersize = itersize
+            curs.execute("SELECT generate_series(1, 100) AS n")
+            self.assertEqual(range(1, 101), [ row['n'] for row in curs ])
+            curs.close()
+
+    def testDictCursorWithNamedCursorRealFetchOne(self):
+        self._testWithNamedCursorReal(lambda curs: curs.fetchone())
+
+    def testDictCursorWithNamedCursorRealFetchMany(self):
+        self._testWithNamedCursorReal(lambda curs: curs.fetchmany(1)[0])
+
+    def testDictCursorWithNamedCursorRealFetchAll(self):
+        self._testWithNamedCursorReal(lambda curs: curs.fetchall()[0])
+
+    def testDictCursorWithNamedCursorRealIter(self):
+        def getter(curs):
+            for row in curs:
+                return row
+        self._testWithNamedCursorReal(getter)
+
+    def testRealDictRowIsDict(self):
+        curs = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        curs.execute("SELECT foo, 42 AS bar FROM ExtrasDictCursorTests")
+        row = curs.fetchone()
+        self.assert_(isinstance(row, dict))
+        self.assertEqual(dict(row), {'foo': 'bar', 'bar': 42})
+
     def _testWithPlainCursor(self, getter):
         curs = self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         curs.execute("SELECT * FROM ExtrasDictCursorTests")
         row = getter(curs)
-        self.failUnless(row['foo'] == 'bar')
-        self.failUnless(row[0] == 'bar')
+        self.assertEqual(row['foo'], 'bar')
+        self.assertEqual(row[0], 'bar')
 
     def _testWithNamedCursor(self, getter):
         curs = self.conn.cursor('aname', cursor_factory=psycopg2.extras.DictCursor)
+        # the getters only read one record: don't fetch more when iterating
+        curs.itersize = 1
         curs.execute("SELECT * FROM ExtrasDictCursorTests")
         row = getter(curs)
-        self.failUnless(row['foo'] == 'bar')
-        self.failUnless(row[0] == 'bar')
+        self.assertEqual(row['foo'], 'bar')
+        self.assertEqual(row[0], 'bar')
 
     def _testWithPlainCursorReal(self, getter):
         curs = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         curs.execute("SELECT * FROM ExtrasDictCursorTests")
         row = getter(curs)
-        self.failUnless(row['foo'] == 'bar')
+        self.assertEqual(row['foo'], 'bar')
 
     def _testWithNamedCursorReal(self, getter):
         curs = self.conn.cursor('aname', cursor_factory=psycopg2.extras.RealDictCursor)
+        curs.itersize = 1
         curs.execute("SELECT * FROM ExtrasDictCursorTests")
         row = getter(curs)
-        self.failUnless(row['foo'] == 'bar')
+        self.assertEqual(row['foo'], 'bar')
 
 
+try:
+    from collections import namedtuple
+except ImportError:
+    HAS_NAMEDTUPLE = False
+else:
+    HAS_NAMEDTUPLE = True
+
 def if_has_namedtuple(f):
+    """Skip a test if collections.namedtuple is not available.
+
+    The check is done once at import time: if namedtuple is available the
+    test is returned undecorated.
+    """
+    if HAS_NAMEDTUPLE:
+        return f
+
     def if_has_namedtuple_(self):
-        try:
-            from collections import namedtuple
-        except ImportError:
-            import warnings
-            warnings.warn("collections.namedtuple not available")
-        else:
-            return f(self)
+        import warnings
+        warnings.warn("collections.namedtuple not available")
 
     if_has_namedtuple_.__name__ = f.__name__
     return if_has_namedtuple_
 
-class NamedTupleCursorTest(unittest.TestCase):
-    def setUp(self):
+_nt_conn = None
+
+def nt_connection():
+    """Return the connection shared by the NamedTupleCursor tests.
+
+    The connection is created on first use together with the test table.
+    The table is temporary, so it is dropped by the server as soon as the
+    connection is closed.
+    """
+    global _nt_conn
+    if _nt_conn is None or _nt_conn.closed:
         from psycopg2.extras import NamedTupleConnection
+        _nt_conn = psycopg2.connect(tests.dsn,
+            connection_factory=NamedTupleConnection)
+        curs = _nt_conn.cursor()
+        curs.execute("CREATE TEMPORARY TABLE nttest (i int, s text)")
+        _nt_conn.commit()
+    return _nt_conn
 
-        try:
-            from collections import namedtuple
-        except ImportError:
+class NamedTupleCursorTest(unittest.TestCase):
+    def setUp(self):
+        if not HAS_NAMEDTUPLE:
             self.conn = None
             return
 
-        self.conn = psycopg2.connect(tests.dsn,
-            connection_factory=NamedTupleConnection)
+        self.conn = nt_connection()
         curs = self.conn.cursor()
-        curs.execute("CREATE TEMPORARY TABLE nttest (i int, s text)")
-        curs.execute(
+        curs.execute("TRUNCATE nttest; "
             "INSERT INTO nttest VALUES (1, 'foo'), (2, 'bar'), (3, 'baz')")
         self.conn.commit()
 
+    def tearDown(self):
+        # terminate the transaction left open by the test
+        if self.conn is not None:
+            self.conn.rollback()
+
     @if_has_namedtuple
     def test_fetchone(self):
         curs = self.conn.cursor()
@@ -158,6 +294,16 @@ class NamedTupleCursorTest(unittest.TestCase):
         self.assertEqual(res[1].i, 2)
         self.assertEqual(res[1].s, 'bar')
 
+    @if_has_namedtuple
+    def test_fetchmany_noarg(self):
+        curs = self.conn.cursor()
+        curs.arraysize = 2
+        curs.execute("select * from nttest order by 1")
+        res = curs.fetchmany()
+        self.assertEqual(2, len(res))
+        self.assertEqual(res[0].i, 1)
+        self.assertEqual(res[1].s, 'bar')
+
     @if_has_namedtuple
     def test_fetchall(self):
         curs = self.conn.cursor()
@@ -187,10 +333,85 @@ class NamedTupleCursorTest(unittest.TestCase):
         self.assertEqual(t.s, 'baz')
         self.assertRaises(StopIteration, i.next)
 
+    @if_has_namedtuple
+    def test_iter_reexecute(self):
+        curs = self.conn.cursor()
+        curs.execute("select * from nttest order by 1")
+        i = iter(curs)
+        t = i.next()
+        self.assertEqual(t.i, 1)
+        # executing in the loop doesn't affect the records being iterated
+        curs.execute("select 10 as x, 20 as y")
+        t = i.next()
+        self.assertEqual(t.i, 2)
+        self.assertEqual(t.s, 'bar')
+        t = curs.fetchone()
+        self.assertEqual(t.x, 10)
+        self.assertEqual(t.y, 20)
+
+    @if_has_namedtuple
+    def test_named_fetchone(self):
+        curs = self.conn.cursor('tmp')
+        curs.execute("select * from nttest order by 1")
+        t = curs.fetchone()
+        self.assertEqual(t.i, 1)
+        self.assertEqual(t.s, 'foo')
+
+    @if_has_namedtuple
+    def test_named_fetchmany(self):
+        curs = self.conn.cursor('tmp')
+        curs.execute("select * from nttest order by 1")
+        res = curs.fetchmany(2)
+        self.assertEqual(2, len(res))
+        self.assertEqual(res[0].i, 1)
+        self.assertEqual(res[1].s, 'bar')
+
+    @if_has_namedtuple
+    def test_named_fetchall(self):
+        curs = self.conn.cursor('tmp')
+        curs.execute("select * from nttest order by 1")
+        res = curs.fetchall()
+        self.assertEqual([1, 2, 3], [t.i for t in res])
+        self.assertEqual(['foo', 'bar', 'baz'], [t.s for t in res])
+
+    @if_has_namedtuple
+    def test_named_iter(self):
+        curs = self.conn.cursor('tmp')
+        curs.itersize = 2
+        curs.execute("select * from nttest order by 1")
+        res = list(curs)
+        self.assertEqual([1, 2, 3], [t.i for t in res])
+        self.assertEqual(['foo', 'bar', 'baz'], [t.s for t in res])
+
+    @if_has_namedtuple
+    def test_named_iter_fetch(self):
+        curs = self.conn.cursor('tmp')
+        curs.itersize = 2
+        curs.execute("select * from nttest order by 1")
+        i = iter(curs)
+        self.assertEqual(i.next().i, 1)
+        # the record buffered by the iterator is returned by fetchall()
+        res = curs.fetchall()
+        self.assertEqual([2, 3], [t.i for t in res])
+
+    @if_has_namedtuple
+    def test_record_cached(self):
+        curs = self.conn.cursor()
+        curs.execute("select i, s from nttest where i = 1")
+        t1 = curs.fetchone()
+        curs = self.conn.cursor()
+        curs.execute("select i, s from nttest where i = 2")
+        t2 = curs.fetchone()
+        self.assert_(type(t1) is type(t2))
+
+        curs.execute("select s, i from nttest where i = 2")
+        t3 = curs.fetchone()
+        self.assert_(type(t1) is not type(t3))
+        self.assertEqual(t3.s, 'bar')
+        self.assertEqual(t3.i, 2)
+
     def test_error_message(self):
-        try:
-            from collections import namedtuple
-        except ImportError:
+        if not HAS_NAMEDTUPLE:
             # an import error somewhere
             from psycopg2.extras import NamedTupleConnection
             try:
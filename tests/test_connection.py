@@ -1,16 +1,27 @@
 #!/usr/bin/env python
 
 import unittest
-from operator import attrgetter
 
 import psycopg2
 import psycopg2.extensions
 import tests
 
 class ConnectionTests(unittest.TestCase):
+    # These tests check the state of a connection through its lifecycle
+    # (closed, reset, notices, default isolation level): they use new
+    # connections instead of the pooled ones.
+    def setUp(self):
+        self._conns = []
+
+    def tearDown(self):
+        for conn in self._conns:
+            if not conn.closed:
+                conn.close()
 
     def connect(self):
-        return psycopg2.connect(tests.dsn)
+        conn = psycopg2.connect(tests.dsn)
+        self._conns.append(conn)
+        return conn
 
     def test_closed_attribute(self):
         conn = self.connect()
@@ -67,11 +78,24 @@ class ConnectionTests(unittest.TestCase):
         self.assert_(conn.encoding in psycopg2.extensions.encodings)
 
 
+_helper_cnn = None
+
+def helper_connection():
+    """Return an autocommit connection shared by the tests helpers.
+
+    The connection is created on first use and whenever it is found closed,
+    so the helpers don't pay a new connection for each query they run.
+    """
+    global _helper_cnn
+    if _helper_cnn is None or _helper_cnn.closed:
+        _helper_cnn = psycopg2.connect(tests.dsn)
+        _helper_cnn.set_isolation_level(0)
+    return _helper_cnn
+
 def skip_if_tpc_disabled(f):
     """Skip a test if the server has tpc support disabled."""
     def skip_if_tpc_disabled_(self):
-        cnn = self.connect()
-        cur = cnn.cursor()
+        cur = helper_connection().cursor()
         try:
             cur.execute("SHOW max_prepared_transactions;")
         except psycopg2.ProgrammingError:
@@ -79,7 +103,7 @@ def skip_if_tpc_disabled(f):
             mtp = 1
         else:
             mtp = int(cur.fetchone()[0])
-        cnn.close()
+        cur.close()
 
         if not mtp:
             import warnings
@@ -93,60 +117,92 @@ def skip_if_tpc_disabled(f):
     return skip_if_tpc_disabled_
 
 class ConnectionTwoPhaseTests(unittest.TestCase):
+    # The helper connection on which the helpers statements are prepared.
+    _stmts_cnn = None
+
     def setUp(self):
+        self._conns = []
         self.make_test_table()
         self.clear_test_xacts()
 
     def tearDown(self):
+        for conn in self._conns:
+            tests.put_conn(conn)
         self.clear_test_xacts()
 
     def clear_test_xacts(self):
         """Rollback all the prepared transaction in the testing db."""
-        cnn = self.connect()
-        cnn.set_isolation_level(0)
-        cur = cnn.cursor()
-        cur.execute(
-            "select gid from pg_prepared_xacts where database = %s",
-            (tests.dbname,))
-        gids = [ r[0] for r in cur ]
-        for gid in gids:
-            cur.execute("rollback prepared %s;", (gid,))
-        cnn.close()
+        cur = helper_connection().cursor()
+        cur.execute("execute tpc_gids(%s);", (tests.dbname,))
+        # rollback prepared can't run in a multi-command string, so a query
+        # per xact is still needed: at least the rows are passed as they are.
+        cur.executemany("rollback prepared %s;", cur.fetchall())
+        cur.close()
 
     def make_test_table(self):
-        cnn = self.connect()
-        cur = cnn.cursor()
-        cur.execute("DROP TABLE IF EXISTS test_tpc;")
-        cur.execute("CREATE TABLE test_tpc (data text);")
-        cnn.commit()
-        cnn.close()
-
-    def count_xacts(self):
-        """Return the number of prepared xacts currently in the test db."""
-        cnn = self.connect()
+        """Create the test table and prepare the helpers statements.
+
+        The statements are prepared on the helper connection, so the queries
+        executed several times by each test are only parsed and planned once.
+        """
+        cnn = helper_connection()
+        if ConnectionTwoPhaseTests._stmts_cnn is cnn:
+            # the statements refer to the table being recreated
+            dealloc = "DEALLOCATE tpc_gids; DEALLOCATE tpc_counts;"
+        else:
+            dealloc = ""
         cur = cnn.cursor()
-        cur.execute("""
-            select count(*) from pg_prepared_xacts
-            where database = %s;""",
-            (tests.dbname,))
-        rv = cur.fetchone()[0]
-        cnn.close()
+        cur.execute(dealloc + """
+            DROP TABLE IF EXISTS test_tpc;
+            CREATE TABLE test_tpc (data text);
+            PREPARE tpc_gids (text) AS
+                select gid from pg_prepared_xacts where database = $1;
+            PREPARE tpc_counts (text) AS
+                select
+                    (select count(*) from pg_prepared_xacts
+                        where database = $1),
+                    (select count(*) from test_tpc);""")
+        cur.close()
+        ConnectionTwoPhaseTests._stmts_cnn = cnn
+
+    def count_xacts_and_records(self):
+        """Return the number of prepared xacts and of test records.
+
+        Both the counts are read in a single query, returning a tuple
+        (xacts in the test db, records in the test table).
+        """
+        cur = helper_connection().cursor()
+        cur.execute("execute tpc_counts(%s);", (tests.dbname,))
+        rv = cur.fetchone()
+        cur.close()
         return rv
 
-    def count_test_records(self):
-        """Return the number of records in the test table."""
-        cnn = self.connect()
-        cur = cnn.cursor()
-        cur.execute("select count(*) from test_tpc;")
-        rv = cur.fetchone()[0]
-        cnn.close()
+    def recover_test_xids(self):
+        """Return the xids of the transactions prepared in the test db.
+
+        Unlike `tpc_recover()` only the xacts of the test database are read
+        from the server. The xids are parsed locally from their gid, so the
+        prepared, owner and database attributes are not set.
+        """
+        from psycopg2.extensions import Xid
+
+        cur = helper_connection().cursor()
+        cur.execute("execute tpc_gids(%s);", (tests.dbname,))
+        rv = [ Xid.from_string(r[0]) for r in cur ]
+        cur.close()
         return rv
 
     def connect(self):
-        return psycopg2.connect(tests.dsn)
+        conn = tests.get_conn()
+        self._conns.append(conn)
+        return conn
 
-    @skip_if_tpc_disabled
-    def test_tpc_commit(self):
+    def _test_tpc_finish(self, op, nrecs):
+        """Prepare a transaction, then terminate it calling `op`.
+
+        *op* is the name of the connection method to call (tpc_commit or
+        tpc_rollback), *nrecs* the records expected in the table afterwards.
+        """
         cnn = self.connect()
         xid = cnn.xid(1, "gtrid", "bqual")
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
@@ -155,21 +211,20 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
 
         cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_commit');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        cur.execute("insert into test_tpc values (%s);", (op,))
+        self.assertEqual((0, 0), self.count_xacts_and_records())
 
         cnn.tpc_prepare()
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_PREPARED)
-        self.assertEqual(1, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        self.assertEqual((1, 0), self.count_xacts_and_records())
 
-        cnn.tpc_commit()
+        getattr(cnn, op)()
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(1, self.count_test_records())
+        self.assertEqual((0, nrecs), self.count_xacts_and_records())
 
-    def test_tpc_commit_one_phase(self):
+    def _test_tpc_finish_one_phase(self, op, nrecs):
+        """Terminate a two-phase transaction calling `op` without preparing.
+        """
         cnn = self.connect()
         xid = cnn.xid(1, "gtrid", "bqual")
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
@@ -178,17 +233,16 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
 
         cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_commit_1p');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        cur.execute("insert into test_tpc values (%s);", (op + '_1p',))
+        self.assertEqual((0, 0), self.count_xacts_and_records())
 
-        cnn.tpc_commit()
+        getattr(cnn, op)()
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(1, self.count_test_records())
+        self.assertEqual((0, nrecs), self.count_xacts_and_records())
 
-    @skip_if_tpc_disabled
-    def test_tpc_commit_recovered(self):
+    def _test_tpc_finish_recovered(self, op, nrecs):
+        """Prepare a transaction, then terminate it from a new connection.
+        """
         cnn = self.connect()
         xid = cnn.xid(1, "gtrid", "bqual")
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
@@ -197,91 +251,41 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
 
         cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_commit_rec');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        cur.execute("insert into test_tpc values (%s);", (op + '_rec',))
+        self.assertEqual((0, 0), self.count_xacts_and_records())
 
         cnn.tpc_prepare()
         cnn.close()
-        self.assertEqual(1, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        self.assertEqual((1, 0), self.count_xacts_and_records())
 
         cnn = self.connect()
         xid = cnn.xid(1, "gtrid", "bqual")
-        cnn.tpc_commit(xid)
+        getattr(cnn, op)(xid)
 
         self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(1, self.count_test_records())
+        self.assertEqual((0, nrecs), self.count_xacts_and_records())
 
     @skip_if_tpc_disabled
-    def test_tpc_rollback(self):
-        cnn = self.connect()
-        xid = cnn.xid(1, "gtrid", "bqual")
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-
-        cnn.tpc_begin(xid)
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
+    def test_tpc_commit(self):
+        self._test_tpc_finish('tpc_commit', 1)
 
-        cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_rollback');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+    def test_tpc_commit_one_phase(self):
+        self._test_tpc_finish_one_phase('tpc_commit', 1)
 
-        cnn.tpc_prepare()
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_PREPARED)
-        self.assertEqual(1, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+    @skip_if_tpc_disabled
+    def test_tpc_commit_recovered(self):
+        self._test_tpc_finish_recovered('tpc_commit', 1)
 
-        cnn.tpc_rollback()
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+    @skip_if_tpc_disabled
+    def test_tpc_rollback(self):
+        self._test_tpc_finish('tpc_rollback', 0)
 
     def test_tpc_rollback_one_phase(self):
-        cnn = self.connect()
-        xid = cnn.xid(1, "gtrid", "bqual")
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-
-        cnn.tpc_begin(xid)
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
-
-        cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_rollback_1p');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
-
-        cnn.tpc_rollback()
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        self._test_tpc_finish_one_phase('tpc_rollback', 0)
 
     @skip_if_tpc_disabled
     def test_tpc_rollback_recovered(self):
-        cnn = self.connect()
-        xid = cnn.xid(1, "gtrid", "bqual")
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-
-        cnn.tpc_begin(xid)
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_BEGIN)
-
-        cur = cnn.cursor()
-        cur.execute("insert into test_tpc values ('test_tpc_commit_rec');")
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
-
-        cnn.tpc_prepare()
-        cnn.close()
-        self.assertEqual(1, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
-
-        cnn = self.connect()
-        xid = cnn.xid(1, "gtrid", "bqual")
-        cnn.tpc_rollback(xid)
-
-        self.assertEqual(cnn.status, psycopg2.extensions.STATUS_READY)
-        self.assertEqual(0, self.count_xacts())
-        self.assertEqual(0, self.count_test_records())
+        self._test_tpc_finish_recovered('tpc_rollback', 0)
 
     def test_status_after_recover(self):
         cnn = self.connect()
@@ -308,19 +312,19 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         cur.execute("""
             select gid, prepared, owner, database
             from pg_prepared_xacts
-            where database = %s;""",
+            where database = %s
+            order by gid;""",
             (tests.dbname,))
         okvals = cur.fetchall()
-        okvals.sort()
 
         cnn = self.connect()
-        xids = cnn.tpc_recover()
-        xids = [ xid for xid in xids if xid.database == tests.dbname ]
-        xids.sort(key=attrgetter('gtrid'))
+        xids = dict([ (xid.gtrid, xid) for xid in cnn.tpc_recover()
+            if xid.database == tests.dbname ])
 
         # check the values returned
         self.assertEqual(len(okvals), len(xids))
-        for (xid, (gid, prepared, owner, database)) in zip (xids, okvals):
+        for (gid, prepared, owner, database) in okvals:
+            xid = xids[gid]
             self.assertEqual(xid.gtrid, gid)
             self.assertEqual(xid.prepared, prepared)
             self.assertEqual(xid.owner, owner)
@@ -341,26 +345,25 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
 
     @skip_if_tpc_disabled
     def test_xid_roundtrip(self):
-        for fid, gtrid, bqual in [
+        okvals = [
             (0, "", ""),
             (42, "gtrid", "bqual"),
             (0x7fffffff, "x" * 64, "y" * 64),
-        ]:
-            cnn = self.connect()
-            xid = cnn.xid(fid, gtrid, bqual)
-            cnn.tpc_begin(xid)
+        ]
+
+        # prepare all the xacts on the same connection: reset() makes it
+        # ready for a new transaction leaving the prepared one on the server.
+        cnn = self.connect()
+        for fid, gtrid, bqual in okvals:
+            cnn.tpc_begin(cnn.xid(fid, gtrid, bqual))
             cnn.tpc_prepare()
-            cnn.close()
+            cnn.reset()
 
-            cnn = self.connect()
-            xids = [ xid for xid in cnn.tpc_recover()
-                if xid.database == tests.dbname ]
-            self.assertEqual(1, len(xids))
-            xid = xids[0]
-            self.assertEqual(xid.format_id, fid)
-            self.assertEqual(xid.gtrid, gtrid)
-            self.assertEqual(xid.bqual, bqual)
+        xids = self.recover_test_xids()
+        self.assertEqual(okvals,
+            sorted([ (xid.format_id, xid.gtrid, xid.bqual) for xid in xids ]))
 
+        for xid in xids:
             cnn.tpc_rollback(xid)
 
     @skip_if_tpc_disabled
@@ -376,8 +379,7 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
             cnn.close()
 
             cnn = self.connect()
-            xids = [ xid for xid in cnn.tpc_recover()
-                if xid.database == tests.dbname ]
+            xids = self.recover_test_xids()
             self.assertEqual(1, len(xids))
             xid = xids[0]
             self.assertEqual(xid.format_id, None)
@@ -423,8 +425,7 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         cnn.tpc_begin(x1)
         cnn.tpc_prepare()
         cnn.reset()
-        xid = [ xid for xid in cnn.tpc_recover()
-            if xid.database == tests.dbname ][0]
+        xid = self.recover_test_xids()[0]
         self.assertEqual(10, xid.format_id)
         self.assertEqual('uni', xid.gtrid)
         self.assertEqual('code', xid.bqual)
@@ -440,8 +441,7 @@ class ConnectionTwoPhaseTests(unittest.TestCase):
         cnn.tpc_prepare()
         cnn.reset()
 
-        xid = [ xid for xid in cnn.tpc_recover()
-            if xid.database == tests.dbname ][0]
+        xid = self.recover_test_xids()[0]
         self.assertEqual(None, xid.format_id)
         self.assertEqual('transaction-id', xid.gtrid)
         self.assertEqual(None, xid.bqual)
@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
+import time
 import unittest
+from datetime import timedelta
 import psycopg2
 import psycopg2.extensions
 import tests
@@ -65,6 +67,79 @@ class CursorTests(unittest.TestCase):
         self.assertEqual('SELECT 10.3;',
             cur.mogrify("SELECT %s;", (Decimal("10.3"),)))
 
+    def test_iter_named_cursor_efficient(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        # if these records are fetched in the same roundtrip their
+        # timestamp will not be influenced by the pause in Python world.
+        cur.execute("""select clock_timestamp() from generate_series(1,2)""")
+        i = iter(cur)
+        t1 = i.next()[0]
+        time.sleep(0.2)
+        t2 = i.next()[0]
+        self.assert_(t2 - t1 < timedelta(seconds=0.1),
+            "named cursor records fetched in 2 roundtrips (delta: %s)"
+            % (t2 - t1))
+        conn.close()
+
+    def test_iter_named_cursor_itersize(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        self.assertEqual(2000, cur.itersize)
+        cur.itersize = 7
+        cur.execute("select generate_series(1, 20)")
+        self.assertEqual(range(1, 21), [r[0] for r in cur])
+        conn.close()
+
+    def test_iter_named_cursor_fetchone(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        cur.itersize = 3
+        cur.execute("select generate_series(1, 10)")
+        i = iter(cur)
+        self.assertEqual((1,), i.next())
+        self.assertEqual((2,), i.next())
+        # the record buffered by the iterator must not be lost
+        self.assertEqual((3,), cur.fetchone())
+        self.assertEqual((4,), cur.fetchone())
+        self.assertEqual((5,), i.next())
+        conn.close()
+
+    def test_iter_named_cursor_fetchmany(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        cur.itersize = 3
+        cur.execute("select generate_series(1, 10)")
+        i = iter(cur)
+        self.assertEqual((1,), i.next())
+        self.assertEqual([(2,)], cur.fetchmany(1))
+        self.assertEqual([(3,), (4,), (5,)], cur.fetchmany(3))
+        self.assertEqual((6,), i.next())
+        conn.close()
+
+    def test_iter_named_cursor_fetchall(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        cur.execute("select generate_series(1, 10)")
+        i = iter(cur)
+        self.assertEqual((1,), i.next())
+        self.assertEqual([(n,) for n in range(2, 11)], cur.fetchall())
+        self.assertRaises(StopIteration, i.next)
+        conn.close()
+
+    def test_iter_named_cursor_scroll(self):
+        conn = self.connect()
+        cur = conn.cursor('tmp')
+        cur.itersize = 2
+        cur.execute("select generate_series(1, 10)")
+        i = iter(cur)
+        self.assertEqual((1,), i.next())
+        # scroll is relative to the last record returned, not to the
+        # last record fetched from the backend
+        cur.scroll(2)
+        self.assertEqual((4,), cur.fetchone())
+        conn.close()
+
 
 def test_suite():
     return unittest.TestLoader().loadTestsFromName(__name__)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+import unittest
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import tests
+
+from psycopg2.extensions import connection
+
+
+class LostConnection(connection):
+    """A connection reporting a lost server."""
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+
+class BrokenRollbackConnection(connection):
+    """A connection failing to roll back, as if the server went away."""
+    def rollback(self):
+        raise psycopg2.OperationalError("server closed the connection")
+
+class LockCheckConnection(connection):
+    """A connection recording if its pool is locked during rollback."""
+    pool = None
+    lock_free = None
+
+    def rollback(self):
+        lock = self.pool._lock
+        self.lock_free = lock.acquire(0)
+        if self.lock_free:
+            lock.release()
+        connection.rollback(self)
+
+
+class PoolTests(unittest.TestCase):
+    def setUp(self):
+        self._pools = []
+
+    def tearDown(self):
+        for pool in self._pools:
+            if not pool.closed:
+                pool.closeall()
+
+    def make_pool(self, factory=psycopg2.pool.SimpleConnectionPool,
+            **kwargs):
+        pool = factory(1, 1, tests.dsn, **kwargs)
+        self._pools.append(pool)
+        return pool
+
+    def test_putconn_idle(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assert_(pool.getconn() is conn)
+
+    def test_putconn_rollback(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        cur = conn.cursor()
+        cur.execute("select 1;")
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_INTRANS)
+
+        pool.putconn(conn)
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        self.assert_(pool.getconn() is conn)
+
+    def test_putconn_rollback_error(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        cur = conn.cursor()
+        self.assertRaises(psycopg2.ProgrammingError,
+            cur.execute, "select foo from nosuchtable;")
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_INERROR)
+
+        pool.putconn(conn)
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        self.assert_(pool.getconn() is conn)
+
+    def test_putconn_closed(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.close()
+
+        pool.putconn(conn)
+        conn1 = pool.getconn()
+        self.assert_(conn1 is not conn)
+        self.assertEqual(conn1.closed, False)
+
+    def test_putconn_unknown_status(self):
+        pool = self.make_pool(connection_factory=LostConnection)
+        conn = pool.getconn()
+
+        pool.putconn(conn)
+        self.assertEqual(conn.closed, True)
+        conn1 = pool.getconn()
+        self.assert_(conn1 is not conn)
+
+    def test_putconn_failed_rollback(self):
+        pool = self.make_pool(connection_factory=BrokenRollbackConnection)
+        conn = pool.getconn()
+        cur = conn.cursor()
+        cur.execute("select 1;")
+
+        pool.putconn(conn)
+        self.assertEqual(conn.closed, True)
+        # the connection slot is released: this would raise "pool exausted"
+        conn1 = pool.getconn()
+        self.assert_(conn1 is not conn)
+
+    def test_threaded_putconn_rollback(self):
+        pool = self.make_pool(psycopg2.pool.ThreadedConnectionPool,
+            connection_factory=LockCheckConnection)
+        conn = pool.getconn()
+        conn.pool = pool
+        cur = conn.cursor()
+        cur.execute("select 1;")
+
+        pool.putconn(conn)
+        # the rollback must not keep the other threads waiting
+        self.assertEqual(conn.lock_free, True)
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        self.assert_(pool.getconn() is conn)
+
+    def test_persistent_putconn_rollback(self):
+        pool = self.make_pool(psycopg2.pool.PersistentConnectionPool,
+            connection_factory=LockCheckConnection)
+        conn = pool.getconn()
+        conn.pool = pool
+        cur = conn.cursor()
+        cur.execute("select 1;")
+
+        pool.putconn()
+        self.assertEqual(conn.lock_free, True)
+        self.assertEqual(conn.get_transaction_status(),
+            psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+        self.assert_(pool.getconn() is conn)
+
+
+def test_suite():
+    return unittest.TestLoader().loadTestsFromName(__name__)
+
+if __name__ == "__main__":
+    unittest.main()